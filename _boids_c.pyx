@@ -0,0 +1,206 @@
+# cython: language_level=3
+# Cython build of the flock kernels in _boids_py.py, for boards where Numba
+# will not install. Same functions, same arguments: the typed memoryviews
+# accept both the array.array buffers and NumPy views that birds.py uses.
+# Build it in place with: python setup.py build_ext --inplace
+#
+# All arithmetic is single precision, matching the float32 storage and the
+# Numba build: the positions only span a 128x32 screen, and on 32-bit ARM
+# only float (not double) maths can use NEON.
+cimport cython
+from libc.math cimport floorf, sqrtf
+
+# --- Flock Kernels ---
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cpdef build_grid(float[::1] xs, float[::1] ys, int[::1] head, int[::1] next_bird,
+                 Py_ssize_t rows, float visual_range):
+    """
+    Buckets birds into square cells visual_range pixels wide, so neighbor
+    searches only need to look at the 3x3 block of cells around each bird.
+    Each cell is a linked list: head[cx * rows + cy] is the first bird in the
+    cell and next_bird[i] the one after bird i, with -1 ending the list.
+    :param xs, ys: Bird positions.
+    :param head: One int32 per grid cell, overwritten.
+    :param next_bird: One int32 per bird, overwritten.
+    :param rows: Number of grid rows.
+    :param visual_range: Cell size in pixels.
+    """
+    cdef Py_ssize_t cols = head.shape[0] // rows
+    cdef Py_ssize_t i, c, cx, cy
+    for c in range(head.shape[0]):
+        head[c] = -1
+    for i in range(xs.shape[0]):
+        cx = min(<Py_ssize_t>floorf(xs[i] / visual_range), cols - 1)
+        cy = min(<Py_ssize_t>floorf(ys[i] / visual_range), rows - 1)
+        c = cx * rows + cy
+        next_bird[i] = head[c]
+        head[c] = <int>i
+
+cdef inline (float, float) bounce(float p, float v, float size) nogil:
+    """
+    If a bird has left the area along one axis, reverses its velocity on that
+    axis and clamps its position to the edge (pixels are 0 to size-1), with a
+    small push away from the wall to prevent sticking.
+    """
+    cdef bint below = p < 0
+    cdef bint above = p >= size
+    cdef float push = <float>0.1
+    v = (push - v) if below else ((-v - push) if above else v)
+    p = <float>0 if below else ((size - <float>1) if above else p)
+    return p, v
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cpdef step(float[::1] xs, float[::1] ys, float[::1] vxs, float[::1] vys,
+           float[::1] steer_xs, float[::1] steer_ys, float[::1] noise,
+           int[::1] head, int[::1] next_bird, Py_ssize_t rows,
+           float width, float height, tuple params):
+    """
+    Advances the flock by one frame in place: applies jitter and the flocking
+    rules, limits speed, moves every bird and bounces it off the edges.
+    Bird 0 is the leader if leader_enabled is set in params.
+    See _boids_py.step() for the arguments.
+    """
+    cdef float visual_range, visual_range_sq, min_separation_sq
+    cdef float cohesion_weight, alignment_weight, separation_weight
+    cdef bint leader_enabled
+    cdef float leader_follow_weight, jitter, max_speed, min_speed
+    (visual_range, visual_range_sq, min_separation_sq,
+     cohesion_weight, alignment_weight, separation_weight,
+     leader_enabled, leader_follow_weight,
+     jitter, max_speed, min_speed) = params
+    cdef float max_speed_sq = max_speed * max_speed
+    cdef float min_speed_sq = min_speed * min_speed
+    cdef Py_ssize_t n = xs.shape[0]
+    cdef Py_ssize_t cols = head.shape[0] // rows
+
+    cdef Py_ssize_t i, j, first, cx, cy, gx, gy, count
+    cdef float x, y, vx, vy, other_x, other_y, dx, dy, dist2, inv_dist
+    cdef float sum_x, sum_y, sum_vx, sum_vy, sep_x, sep_y
+    cdef float steer_x, steer_y, inv_count, speed2, scale, leader_x, leader_y
+    cdef float one = 1, two = 2, zero = 0
+
+    # Add random jitter for more organic movement to all birds, before the
+    # flocking rules so alignment steers against the jittered velocities
+    for i in range(n):
+        vxs[i] += (two * noise[4 * i] - one) * jitter
+        vys[i] += (two * noise[4 * i + 1] - one) * jitter
+
+    # Steering from the flocking rules, all computed from this frame's state
+    # before anyone moves, in a single walk over each bird's neighbors.
+    # The leader (bird 0) only wanders, so it gets none. Without a leader,
+    # every bird flocks and nobody is pulled towards bird 0.
+    first = 0
+    if leader_enabled:
+        first = 1
+        steer_xs[0] = zero
+        steer_ys[0] = zero
+    else:
+        leader_follow_weight = zero
+    leader_x = xs[0]
+    leader_y = ys[0]
+    for i in range(first, n):
+        x = xs[i]
+        y = ys[i]
+        count = 0
+        sum_x = sum_y = zero
+        sum_vx = sum_vy = zero
+        sep_x = sep_y = zero
+
+        # With cells visual_range wide, every flockmate in range sits in
+        # this bird's cell or one of its 8 neighbors
+        cx = min(<Py_ssize_t>floorf(x / visual_range), cols - 1)
+        cy = min(<Py_ssize_t>floorf(y / visual_range), rows - 1)
+        for gx in range(max(cx - 1, 0), min(cx + 2, cols)):
+            for gy in range(max(cy - 1, 0), min(cy + 2, rows)):
+                j = head[gx * rows + gy]
+                while j >= 0:
+                    if j != i:
+                        other_x = xs[j]
+                        other_y = ys[j]
+                        dx = x - other_x
+                        dy = y - other_y
+                        dist2 = dx * dx + dy * dy
+                        if dist2 < visual_range_sq:
+                            count += 1
+                            sum_x += other_x
+                            sum_y += other_y
+                            sum_vx += vxs[j]
+                            sum_vy += vys[j]
+                            if dist2 < min_separation_sq and dist2 > 0: # Avoid division by zero
+                                # Steer away, inversely proportional to distance
+                                inv_dist = one / sqrtf(dist2)
+                                sep_x += dx * inv_dist
+                                sep_y += dy * inv_dist
+                    j = next_bird[j]
+
+        # Separation pushes away from crowding flockmates, and every bird
+        # follows the leader
+        steer_x = sep_x * separation_weight + (leader_x - x) * leader_follow_weight
+        steer_y = sep_y * separation_weight + (leader_y - y) * leader_follow_weight
+        if count > 0:
+            # Cohesion steers towards the average position of local flockmates,
+            # alignment towards their average heading
+            inv_count = one / count
+            steer_x += ((sum_x * inv_count - x) * cohesion_weight
+                        + (sum_vx * inv_count - vxs[i]) * alignment_weight)
+            steer_y += ((sum_y * inv_count - y) * cohesion_weight
+                        + (sum_vy * inv_count - vys[i]) * alignment_weight)
+        steer_xs[i] = steer_x
+        steer_ys[i] = steer_y
+
+    for i in range(n):
+        vx = vxs[i] + steer_xs[i]
+        vy = vys[i] + steer_ys[i]
+
+        # Limit speed, comparing squared speeds and rescaling with one
+        # reciprocal that both components multiply by
+        speed2 = vx * vx + vy * vy
+        if speed2 > max_speed_sq:
+            scale = max_speed / sqrtf(speed2)
+            vx *= scale
+            vy *= scale
+        elif speed2 < min_speed_sq:
+            # Prevent birds from stopping completely. If speed is zero, give it a random impulse.
+            if speed2 > 0:
+                scale = min_speed / sqrtf(speed2)
+                vx *= scale
+                vy *= scale
+            else:
+                vx = (two * noise[4 * i + 2] - one) * min_speed
+                vy = (two * noise[4 * i + 3] - one) * min_speed
+
+        # Update position
+        x = xs[i] + vx
+        y = ys[i] + vy
+
+        # --- Boundary Bounce Logic ---
+        x, vx = bounce(x, vx, width)
+        y, vy = bounce(y, vy, height)
+
+        xs[i] = x
+        ys[i] = y
+        vxs[i] = vx
+        vys[i] = vy
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef draw_flock(float[::1] xs, float[::1] ys, unsigned char[::1] pixels, Py_ssize_t width):
+    """
+    Clears the framebuffer and draws each bird as a single white pixel.
+    :param xs, ys: Bird positions.
+    :param pixels: uint8 array of framebuffer pixel bytes, in pages of 8 rows.
+    :param width: The framebuffer width in pixels.
+    """
+    cdef Py_ssize_t height = pixels.shape[0] // width * 8
+    cdef Py_ssize_t i, x, y
+    pixels[:] = 0
+    for i in range(xs.shape[0]):
+        # Clamp to the screen, so a bird on the far edge can never index
+        # past the framebuffer or wrap onto the next page
+        x = min(<Py_ssize_t>xs[i], width - 1)
+        y = min(<Py_ssize_t>ys[i], height - 1)
+        pixels[(y >> 3) * width + x] |= 1 << (y & 7)
@@ -0,0 +1,215 @@
+import math
+
+try:
+    from numba import njit
+    import numpy as np
+    COMPILED = True
+    # Compiled, the kernels run in single precision like the float32 buffers
+    # they work on, and like the Cython build. Their float arguments should
+    # be converted with real() too, or Numba will widen the maths to double.
+    real = np.float32
+except ImportError:
+    # Without Numba the kernels below still work, they just run as plain Python
+    COMPILED = False
+    real = float
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+ZERO, ONE, TWO = real(0), real(1), real(2)
+PUSH = real(0.1) # Push away from a wall a bird bounces off
+
+# --- Flock Kernels ---
+# The per-frame work is plain loops over flat 1D buffers, which Numba
+# compiles to native code (cached on disk, so only the first run pays for it).
+# The kernels only ever index their buffers, so without Numba they run
+# unchanged on array.array storage.
+@njit(cache=True, fastmath=True)
+def build_grid(xs, ys, head, next_bird, rows, visual_range):
+    """
+    Buckets birds into square cells visual_range pixels wide, so neighbor
+    searches only need to look at the 3x3 block of cells around each bird.
+    Each cell is a linked list: head[cx * rows + cy] is the first bird in the
+    cell and next_bird[i] the one after bird i, with -1 ending the list.
+    :param xs, ys: Bird positions.
+    :param head: One int32 per grid cell, overwritten.
+    :param next_bird: One int32 per bird, overwritten.
+    :param rows: Number of grid rows.
+    :param visual_range: Cell size in pixels, as a real().
+    """
+    cols = len(head) // rows
+    for c in range(len(head)):
+        head[c] = -1
+    for i in range(len(xs)):
+        cx = min(int(xs[i] // visual_range), cols - 1)
+        cy = min(int(ys[i] // visual_range), rows - 1)
+        c = cx * rows + cy
+        next_bird[i] = head[c]
+        head[c] = i
+
+@njit(cache=True, fastmath=True, inline="always")
+def bounce(p, v, size):
+    """
+    If a bird has left the area along one axis, reverses its velocity on that
+    axis and clamps its position to the edge (pixels are 0 to size-1), with a
+    small push away from the wall to prevent sticking. Written as selects
+    rather than if/else, since after the flock scatters which birds are out
+    of bounds is unpredictable; compiled, these become conditional moves.
+    :param p: Position on the axis.
+    :param v: Velocity on the axis.
+    :param size: Size of the area on the axis.
+    :return: The new (position, velocity).
+    """
+    below = p < 0
+    above = p >= size
+    v = (PUSH - v) if below else ((-v - PUSH) if above else v)
+    p = ZERO if below else ((size - ONE) if above else p)
+    return p, v
+
+@njit(cache=True, fastmath=True)
+def step(xs, ys, vxs, vys, steer_xs, steer_ys, noise, head, next_bird, rows, width, height, params):
+    """
+    Advances the flock by one frame in place: applies jitter and the flocking
+    rules, limits speed, moves every bird and bounces it off the edges.
+    Bird 0 is the leader if leader_enabled is set in params.
+    :param xs, ys: Bird positions.
+    :param vxs, vys: Bird velocities.
+    :param steer_xs, steer_ys: Scratch buffers, one float per bird.
+    :param noise: Four uniform random numbers in [0, 1) per bird for this
+                  frame: noise[4 * i] and noise[4 * i + 1] drive the jitter,
+                  the other two the impulse given to a bird that has stopped.
+    :param head: Grid cell heads for the current positions, from build_grid().
+    :param next_bird: Grid cell links for the current positions, from build_grid().
+    :param rows: Number of grid rows.
+    :param width: The width of the simulation area (OLED screen width), as a real().
+    :param height: The height of the simulation area (OLED screen height), as a real().
+    :param params: Weights and limits as real() values, laid out as birds.STEP_PARAMS.
+    """
+    (visual_range, visual_range_sq, min_separation_sq,
+     cohesion_weight, alignment_weight, separation_weight,
+     leader_enabled, leader_follow_weight,
+     jitter, max_speed, min_speed) = params
+    max_speed_sq = max_speed * max_speed
+    min_speed_sq = min_speed * min_speed
+    n = len(xs)
+    cols = len(head) // rows
+
+    # Add random jitter for more organic movement to all birds, before the
+    # flocking rules so alignment steers against the jittered velocities
+    for i in range(n):
+        vxs[i] += (TWO * noise[4 * i] - ONE) * jitter
+        vys[i] += (TWO * noise[4 * i + 1] - ONE) * jitter
+
+    # Steering from the flocking rules, all computed from this frame's state
+    # before anyone moves, in a single walk over each bird's neighbors.
+    # The leader (bird 0) only wanders, so it gets none. Without a leader,
+    # every bird flocks and nobody is pulled towards bird 0.
+    first = 0
+    if leader_enabled:
+        first = 1
+        steer_xs[0] = ZERO
+        steer_ys[0] = ZERO
+    else:
+        leader_follow_weight = ZERO
+    leader_x = xs[0]
+    leader_y = ys[0]
+    for i in range(first, n):
+        x = xs[i]
+        y = ys[i]
+        count = 0
+        sum_x = sum_y = ZERO
+        sum_vx = sum_vy = ZERO
+        sep_x = sep_y = ZERO
+
+        # With cells visual_range wide, every flockmate in range sits in
+        # this bird's cell or one of its 8 neighbors
+        cx = min(int(x // visual_range), cols - 1)
+        cy = min(int(y // visual_range), rows - 1)
+        for gx in range(max(cx - 1, 0), min(cx + 2, cols)):
+            for gy in range(max(cy - 1, 0), min(cy + 2, rows)):
+                j = head[gx * rows + gy]
+                while j >= 0:
+                    if j != i:
+                        other_x = xs[j]
+                        other_y = ys[j]
+                        dx = x - other_x
+                        dy = y - other_y
+                        dist2 = dx * dx + dy * dy
+                        if dist2 < visual_range_sq:
+                            count += 1
+                            sum_x += other_x
+                            sum_y += other_y
+                            sum_vx += vxs[j]
+                            sum_vy += vys[j]
+                            if dist2 < min_separation_sq and dist2 > 0: # Avoid division by zero
+                                # Steer away, inversely proportional to distance
+                                inv_dist = ONE / math.sqrt(dist2)
+                                sep_x += dx * inv_dist
+                                sep_y += dy * inv_dist
+                    j = next_bird[j]
+
+        # Separation pushes away from crowding flockmates, and every bird
+        # follows the leader
+        steer_x = sep_x * separation_weight + (leader_x - x) * leader_follow_weight
+        steer_y = sep_y * separation_weight + (leader_y - y) * leader_follow_weight
+        if count > 0:
+            # Cohesion steers towards the average position of local flockmates,
+            # alignment towards their average heading
+            inv_count = ONE / real(count)
+            steer_x += ((sum_x * inv_count - x) * cohesion_weight
+                        + (sum_vx * inv_count - vxs[i]) * alignment_weight)
+            steer_y += ((sum_y * inv_count - y) * cohesion_weight
+                        + (sum_vy * inv_count - vys[i]) * alignment_weight)
+        steer_xs[i] = steer_x
+        steer_ys[i] = steer_y
+
+    for i in range(n):
+        vx = vxs[i] + steer_xs[i]
+        vy = vys[i] + steer_ys[i]
+
+        # Limit speed, comparing squared speeds and rescaling with one
+        # reciprocal that both components multiply by
+        speed2 = vx * vx + vy * vy
+        if speed2 > max_speed_sq:
+            scale = max_speed / math.sqrt(speed2)
+            vx *= scale
+            vy *= scale
+        elif speed2 < min_speed_sq:
+            # Prevent birds from stopping completely. If speed is zero, give it a random impulse.
+            if speed2 > 0:
+                scale = min_speed / math.sqrt(speed2)
+                vx *= scale
+                vy *= scale
+            else:
+                vx = (TWO * noise[4 * i + 2] - ONE) * min_speed
+                vy = (TWO * noise[4 * i + 3] - ONE) * min_speed
+
+        # Update position, rounded to storage precision before the bounds
+        # test: a double just below the edge can round up onto it as float32
+        xs[i] = xs[i] + vx
+        ys[i] = ys[i] + vy
+
+        # --- Boundary Bounce Logic ---
+        x, vx = bounce(xs[i], vx, width)
+        y, vy = bounce(ys[i], vy, height)
+
+        xs[i] = x
+        ys[i] = y
+        vxs[i] = vx
+        vys[i] = vy
+
+@njit(cache=True, fastmath=True)
+def draw_flock(xs, ys, pixels, width):
+    """
+    Clears the framebuffer and draws each bird as a single white pixel.
+    :param xs, ys: Bird positions.
+    :param pixels: uint8 array of framebuffer pixel bytes, in pages of 8 rows.
+    :param width: The framebuffer width in pixels.
+    """
+    height = len(pixels) // width * 8
+    pixels[:] = 0
+    for i in range(len(xs)):
+        # Clamp to the screen, so a bird on the far edge can never index
+        # past the framebuffer or wrap onto the next page
+        x = min(int(xs[i]), width - 1)
+        y = min(int(ys[i]), height - 1)
+        pixels[(y >> 3) * width + x] |= 1 << (y & 7)
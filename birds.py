@@ -1,11 +1,18 @@
-import board
 import digitalio
-import busio
-from PIL import Image, ImageDraw
-import adafruit_ssd1306
 import time
-import random
-import math
+from array import array
+from dataclasses import dataclass
+import numpy as np
+from oled import ThreadedDisplay, open_display
+
+try:
+    # Cython build of the kernels (see setup.py), for boards that cannot install Numba
+    from _boids_c import build_grid, step, draw_flock
+    KERNELS_TAKE_NDARRAYS = False
+    real = float # Converted to C floats on the way in
+except ImportError:
+    # Numba-compiled kernels, or the same code as plain Python without Numba
+    from _boids_py import build_grid, step, draw_flock, real, COMPILED as KERNELS_TAKE_NDARRAYS
 
 # --- OLED Display Configuration ---
 # Assuming a 128x32 PiOLED. Adjust if your screen is 128x64.
@@ -13,185 +20,127 @@ import math
 OLED_WIDTH = 128
 OLED_HEIGHT = 32
 
-# I2C setup for the OLED display
-# On a Raspberry Pi, the default I2C pins are usually:
-# SDA: GPIO 2 (physical pin 3)
-# SCL: GPIO 3 (physical pin 5)
-i2c = busio.I2C(board.SCL, board.SDA)
-# Corrected typo: SSD1306_I2C instead of SSD1306_I21C
-display = adafruit_ssd1306.SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, i2c, addr=0x3C)
-
-# Clear the display initially
-display.fill(0)
-display.show()
+# Set up the OLED on the default I2C pins, cleared. For the best frame rate,
+# switch the bus to fast mode as described in oled.py.
+display = open_display(OLED_WIDTH, OLED_HEIGHT, addr=0x3C)
 
 # --- Boid Simulation Parameters ---
 NUM_BIRDS = 30  # Number of birds in the flock
 VISUAL_RANGE = 20  # How far a bird can "see" other birds
 MIN_SEPARATION = 5 # Minimum distance to maintain from other birds
+# Squared ranges, so neighbor tests can compare squared distances without a sqrt
+VISUAL_RANGE_SQ = VISUAL_RANGE * VISUAL_RANGE
+MIN_SEPARATION_SQ = MIN_SEPARATION * MIN_SEPARATION
 
 # Weights for flocking behaviors (adjust these to change flocking style)
 COHESION_WEIGHT = 0.001
 ALIGNMENT_WEIGHT = 0.05
 SEPARATION_WEIGHT = 0.05
+LEADER_ENABLED = True # Bird 0 leads: it only wanders, and the rest of the flock follows it
 LEADER_FOLLOW_WEIGHT = 0.01 # How strongly non-leader birds follow the leader
 RANDOM_JITTER_MAGNITUDE = 0.05 # Small random force applied to all birds for wandering
 
 MAX_SPEED = 2.0
 MIN_SPEED = 0.5
 
-# --- Bird Class Definition ---
-class Bird:
-    def __init__(self, width, height):
-        """
-        Initializes a new bird with a random position and velocity.
-        :param width: The width of the simulation area (OLED screen width).
-        :param height: The height of the simulation area (OLED screen height).
-        """
-        self.x = random.uniform(0, width)
-        self.y = random.uniform(0, height)
-        self.vx = random.uniform(-1, 1) * MAX_SPEED
-        self.vy = random.uniform(-1, 1) * MAX_SPEED
-        self.width = width
-        self.height = height
-
-    def _distance(self, other_bird):
-        """Calculates the Euclidean distance to another bird."""
-        return math.sqrt((self.x - other_bird.x)**2 + (self.y - other_bird.y)**2)
-
-    def _get_neighbors(self, flock):
-        """Returns a list of birds within the visual range."""
-        neighbors = []
-        for other_bird in flock:
-            if other_bird is not self:
-                dist = self._distance(other_bird)
-                if dist < VISUAL_RANGE:
-                    neighbors.append(other_bird)
-        return neighbors
-
-    def _rule_cohesion(self, neighbors):
-        """
-        Steers the bird towards the average position of local flockmates.
-        """
-        if not neighbors:
-            return 0, 0
+FRAME_PERIOD = 0.05 # Seconds per frame; adjust this value to make the simulation faster/slower
 
-        center_x = sum(b.x for b in neighbors) / len(neighbors)
-        center_y = sum(b.y for b in neighbors) / len(neighbors)
+# Shared random generator; each frame draws all the flock's random numbers in one call
+rng = np.random.default_rng()
 
-        return (center_x - self.x) * COHESION_WEIGHT, \
-               (center_y - self.y) * COHESION_WEIGHT
+# Weights and limits handed to the step kernel, in the order it unpacks them,
+# in the kernels' precision
+STEP_PARAMS = (
+    real(VISUAL_RANGE), real(VISUAL_RANGE_SQ), real(MIN_SEPARATION_SQ),
+    real(COHESION_WEIGHT), real(ALIGNMENT_WEIGHT), real(SEPARATION_WEIGHT),
+    LEADER_ENABLED, real(LEADER_FOLLOW_WEIGHT),
+    real(RANDOM_JITTER_MAGNITUDE), real(MAX_SPEED), real(MIN_SPEED),
+)
 
-    def _rule_alignment(self, neighbors):
-        """
-        Steers the bird towards the average heading (velocity) of local flockmates.
-        """
-        if not neighbors:
-            return 0, 0
-
-        avg_vx = sum(b.vx for b in neighbors) / len(neighbors)
-        avg_vy = sum(b.vy for b in neighbors) / len(neighbors)
-
-        return (avg_vx - self.vx) * ALIGNMENT_WEIGHT, \
-               (avg_vy - self.vy) * ALIGNMENT_WEIGHT
-
-    def _rule_separation(self, neighbors):
-        """
-        Avoids crowding local flockmates by steering away from them.
-        """
-        if not neighbors:
-            return 0, 0
-
-        steer_x, steer_y = 0, 0
-        for other_bird in neighbors:
-            dist = self._distance(other_bird)
-            if dist < MIN_SEPARATION and dist > 0: # Avoid division by zero
-                # Steer away, inversely proportional to distance
-                steer_x += (self.x - other_bird.x) / dist
-                steer_y += (self.y - other_bird.y) / dist
-
-        return steer_x * SEPARATION_WEIGHT, steer_y * SEPARATION_WEIGHT
+def flock_buffer(typecode, values):
+    """
+    Allocates flock state as a contiguous array.array, so each value is a
+    raw C number rather than a boxed Python object. Numba-compiled kernels
+    are handed a NumPy view of the same memory instead.
+    :param typecode: 'f' for float32 or 'i' for int32 values.
+    :param values: Initial contents.
+    """
+    buf = array(typecode, values)
+    return np.frombuffer(buf, dtype=np.float32 if typecode == "f" else np.intc) if KERNELS_TAKE_NDARRAYS else buf
 
-    def _rule_follow_leader(self, leader_bird):
+# --- Flock Definition ---
+@dataclass
+class Flock:
+    """
+    The whole flock stored as Structure-of-Arrays float32 buffers, along
+    with the spatial grid used for neighbor searches. Bird 0 is the leader
+    when LEADER_ENABLED is set.
+    :param xs, ys: Bird positions.
+    :param vxs, vys: Bird velocities.
+    :param steer_xs, steer_ys: Scratch buffers for the step kernel.
+    :param noise: Scratch buffer for each frame's random numbers, four per bird.
+    :param noise_out: NumPy view of noise, for the random generator to fill.
+    :param head: int32 grid cell heads, cols * rows of them.
+    :param next_bird: int32 grid cell links, one per bird.
+    :param rows: Number of grid rows.
+    :param width: The width of the simulation area (OLED screen width).
+    :param height: The height of the simulation area (OLED screen height).
+    """
+    __slots__ = ("xs", "ys", "vxs", "vys", "steer_xs", "steer_ys", "noise",
+                 "noise_out", "head", "next_bird", "rows", "width", "height")
+
+    xs: object
+    ys: object
+    vxs: object
+    vys: object
+    steer_xs: object
+    steer_ys: object
+    noise: object
+    noise_out: np.ndarray
+    head: object
+    next_bird: object
+    rows: int
+    width: float
+    height: float
+
+    @classmethod
+    def random(cls, num_birds, width, height):
         """
-        Steers the bird towards the leader's position.
+        Creates a flock with random positions and velocities.
+        :param num_birds: Number of birds in the flock.
+        :param width: The width of the simulation area (OLED screen width).
+        :param height: The height of the simulation area (OLED screen height).
         """
-        if leader_bird is None:
-            return 0, 0
-
-        return (leader_bird.x - self.x) * LEADER_FOLLOW_WEIGHT, \
-               (leader_bird.y - self.y) * LEADER_FOLLOW_WEIGHT
-
-    def update(self, flock, is_leader=False):
+        cols = -(-width // VISUAL_RANGE)
+        rows = -(-height // VISUAL_RANGE)
+        zeros = [0] * num_birds
+        noise = flock_buffer("f", zeros * 4)
+        return cls(
+            flock_buffer("f", rng.uniform(0, width, num_birds).tolist()),
+            flock_buffer("f", rng.uniform(0, height, num_birds).tolist()),
+            flock_buffer("f", (rng.uniform(-1, 1, num_birds) * MAX_SPEED).tolist()),
+            flock_buffer("f", (rng.uniform(-1, 1, num_birds) * MAX_SPEED).tolist()),
+            flock_buffer("f", zeros),
+            flock_buffer("f", zeros),
+            noise, np.frombuffer(noise, dtype=np.float32),
+            flock_buffer("i", [-1] * (cols * rows)),
+            flock_buffer("i", [-1] * num_birds),
+            rows, real(width), real(height),
+        )
+
+    def build_grid(self):
+        """Rebuilds the spatial grid from the current positions."""
+        build_grid(self.xs, self.ys, self.head, self.next_bird, self.rows, STEP_PARAMS[0])
+
+    def update(self):
         """
-        Updates the bird's position and velocity based on flocking rules and
-        handles boundary collisions (bouncing off edges).
-        :param flock: The list of all birds in the simulation.
-        :param is_leader: True if this bird is the designated leader.
+        Updates every bird's position and velocity based on flocking rules and
+        handles boundary collisions (bouncing off edges). The grid must have
+        been rebuilt since the birds last moved.
         """
-        # Add random jitter for more organic movement to all birds
-        self.vx += random.uniform(-RANDOM_JITTER_MAGNITUDE, RANDOM_JITTER_MAGNITUDE)
-        self.vy += random.uniform(-RANDOM_JITTER_MAGNITUDE, RANDOM_JITTER_MAGNITUDE)
-
-        if not is_leader:
-            neighbors = self._get_neighbors(flock)
-            leader_bird = flock[0] # Assuming flock[0] is always the leader
-
-            # Calculate steering forces from each rule
-            coh_vx, coh_vy = self._rule_cohesion(neighbors)
-            ali_vx, ali_vy = self._rule_alignment(neighbors)
-            sep_vx, sep_vy = self._rule_separation(neighbors)
-            follow_vx, follow_vy = self._rule_follow_leader(leader_bird)
-
-            # Apply forces to velocity
-            self.vx += coh_vx + ali_vx + sep_vx + follow_vx
-            self.vy += coh_vy + ali_vy + sep_vy + follow_vy
-        else:
-            # Leader's movement is primarily random and then boundary-checked
-            # No flocking rules for the leader itself
-            pass
-
-        # Limit speed
-        speed = math.sqrt(self.vx**2 + self.vy**2)
-        if speed > MAX_SPEED:
-            self.vx = (self.vx / speed) * MAX_SPEED
-            self.vy = (self.vy / speed) * MAX_SPEED
-        elif speed < MIN_SPEED:
-            # Prevent birds from stopping completely. If speed is zero, give it a random impulse.
-            if speed > 0:
-                self.vx = (self.vx / speed) * MIN_SPEED
-                self.vy = (self.vy / speed) * MIN_SPEED
-            else:
-                self.vx = random.uniform(-1, 1) * MIN_SPEED
-                self.vy = random.uniform(-1, 1) * MIN_SPEED
-
-
-        # Update position
-        self.x += self.vx
-        self.y += self.vy
-
-        # --- Boundary Bounce Logic ---
-        # If a bird hits the horizontal boundary, reverse its horizontal velocity
-        # and clamp its position to the edge. Add a small push to prevent sticking.
-        if self.x < 0:
-            self.x = 0
-            self.vx *= -1
-            self.vx += 0.1 # Small positive push away from the wall
-        elif self.x >= self.width: # Use >= width as pixels are 0 to width-1
-            self.x = self.width - 1 # Clamp to the last valid pixel
-            self.vx *= -1
-            self.vx -= 0.1 # Small negative push away from the wall
-
-        # If a bird hits the vertical boundary, reverse its vertical velocity
-        # and clamp its position to the edge. Add a small push to prevent sticking.
-        if self.y < 0:
-            self.y = 0
-            self.vy *= -1
-            self.vy += 0.1 # Small positive push away from the wall
-        elif self.y >= self.height: # Use >= height as pixels are 0 to height-1
-            self.y = self.height - 1 # Clamp to the last valid pixel
-            self.vy *= -1
-            self.vy -= 0.1 # Small negative push away from the wall
+        rng.random(dtype=np.float32, out=self.noise_out)
+        step(self.xs, self.ys, self.vxs, self.vys, self.steer_xs, self.steer_ys, self.noise,
+             self.head, self.next_bird, self.rows, self.width, self.height, STEP_PARAMS)
 
 # --- Main Simulation Loop ---
 def run_simulation():
@@ -199,38 +148,38 @@ def run_simulation():
     Initializes birds and runs the main simulation loop, updating and
     drawing birds on the OLED display.
     """
-    flock = [Bird(OLED_WIDTH, OLED_HEIGHT) for _ in range(NUM_BIRDS)]
+    flock = Flock.random(NUM_BIRDS, OLED_WIDTH, OLED_HEIGHT)
+
+    # The kernels draw straight into the driver's framebuffer (laid out as
+    # described in oled.open_display()), through one array view of its pixel
+    # bytes made up front so each frame allocates nothing
+    pixels = np.frombuffer(display.buffer, dtype=np.uint8)[1:]
+    # Send frames while the flock moves on to the next one
+    screen = ThreadedDisplay(display)
 
     print("Starting bird flocking simulation...")
     print("Press Ctrl+C to exit.")
 
     try:
         while True:
-            # Create a blank image for the display
-            image = Image.new("1", (OLED_WIDTH, OLED_HEIGHT))
-            draw = ImageDraw.Draw(image)
+            frame_start = time.perf_counter()
 
-            # Update and draw each bird
-            for i, bird in enumerate(flock):
-                # Pass is_leader=True for the first bird (index 0)
-                bird.update(flock, is_leader=(i == 0))
-                # Draw the bird as a single white pixel
-                # Ensure coordinates are integers and within bounds
-                draw.point((int(bird.x), int(bird.y)), fill=255)
+            # Update the whole flock, then redraw it
+            flock.build_grid()
+            flock.update()
+            draw_flock(flock.xs, flock.ys, pixels, OLED_WIDTH)
 
-            # Display the image on the OLED
-            display.image(image)
-            display.show()
+            screen.show()
 
-            # Small delay to control simulation speed
-            time.sleep(0.05) # Adjust this value to make the simulation faster/slower
+            # Keep the flock moving at a steady speed
+            elapsed = time.perf_counter() - frame_start
+            if elapsed < FRAME_PERIOD:
+                time.sleep(FRAME_PERIOD - elapsed)
 
     except KeyboardInterrupt:
         print("\nSimulation stopped by user.")
     finally:
-        # Clear the display before exiting
-        display.fill(0)
-        display.show()
+        screen.clear()
 
 if __name__ == "__main__":
     run_simulation()
@@ -1,9 +1,6 @@
-import board
-import busio
-import adafruit_ssd1306
-from PIL import Image, ImageDraw, ImageFont
 import time
-import random
+import numpy as np
+from oled import ThreadedDisplay, open_display
 
 # --- Configuration ---
 # OLED dimensions (Adafruit PiOLED is typically 128x32)
@@ -22,10 +19,14 @@ MOVE_SPEED = 1    # Max pixels a firefly can move per update
 BLINK_CHANCE = 0.05 # Probability (0.0 to 1.0) of a firefly blinking on in any given frame
 BLINK_DURATION = 5 # Number of frames a firefly stays lit once it blinks on
 
+FRAME_PERIOD = 0.05 # Seconds per frame; adjust this value to make it faster or slower
+
+# Shared random generator; each frame draws every firefly's random numbers in one call per kind
+rng = np.random.default_rng()
+
 # --- Initialize I2C and OLED Display ---
 try:
-    i2c = busio.I2C(board.SCL, board.SDA)
-    display = adafruit_ssd1306.SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, i2c, addr=I2C_ADDRESS)
+    display = open_display(OLED_WIDTH, OLED_HEIGHT, addr=I2C_ADDRESS)
     print("OLED display initialized successfully.")
 except ValueError as e:
     print(f"Error initializing I2C or OLED display: {e}")
@@ -33,74 +34,61 @@ except ValueError as e:
     print("You might need to run 'sudo raspi-config' -> Interface Options -> I2C -> Yes.")
     exit()
 
-# Clear the display
-display.fill(0)
-display.show()
+# --- Firefly State ---
+# One slot per firefly in each array, so the whole swarm updates with a few array operations
+xs = rng.integers(0, OLED_WIDTH, NUM_FIREFLIES)
+ys = rng.integers(0, OLED_HEIGHT, NUM_FIREFLIES)
+lit = np.zeros(NUM_FIREFLIES, dtype=bool)
+blink_timer = np.zeros(NUM_FIREFLIES, dtype=np.int32) # How many frames each will stay lit
 
-# Create a blank image for drawing.
-# Make sure to create an image with mode '1' for 1-bit color (black and white)
-image = Image.new("1", (OLED_WIDTH, OLED_HEIGHT))
-draw = ImageDraw.Draw(image)
-
-# --- Firefly Class/Structure ---
-class Firefly:
-    def __init__(self):
-        self.x = random.randint(0, OLED_WIDTH - 1)
-        self.y = random.randint(0, OLED_HEIGHT - 1)
-        self.is_lit = False
-        self.blink_timer = 0 # How many frames it will stay lit
-
-    def update(self):
-        # Random movement
-        self.x += random.randint(-MOVE_SPEED, MOVE_SPEED)
-        self.y += random.randint(-MOVE_SPEED, MOVE_SPEED)
-
-        # Keep firefly within screen bounds
-        self.x = max(0, min(self.x, OLED_WIDTH - 1))
-        self.y = max(0, min(self.y, OLED_HEIGHT - 1))
-
-        # Handle blinking
-        if self.is_lit:
-            self.blink_timer -= 1
-            if self.blink_timer <= 0:
-                self.is_lit = False
-        else:
-            if random.random() < BLINK_CHANCE:
-                self.is_lit = True
-                self.blink_timer = BLINK_DURATION
-
-    def draw(self, drawer):
-        if self.is_lit:
-            # Draw a white pixel (or small rectangle for larger size)
-            drawer.rectangle((self.x, self.y, self.x + FIREFLY_SIZE - 1, self.y + FIREFLY_SIZE - 1), outline=255, fill=255)
-
-# --- Initialize Fireflies ---
-fireflies = [Firefly() for _ in range(NUM_FIREFLIES)]
+# Draw straight into the driver's framebuffer, laid out as described in
+# oled.open_display()
+buf = display.buffer
+blank = bytes(len(buf) - 1)
+# Only changed pixels are sent, so mostly-dark frames often cost nothing
+screen = ThreadedDisplay(display)
 
 # --- Main Animation Loop ---
 print("Starting firefly simulation. Press Ctrl+C to exit.")
 try:
     while True:
-        # Clear the drawing buffer
-        draw.rectangle((0, 0, OLED_WIDTH, OLED_HEIGHT), outline=0, fill=0)
-
-        # Update and draw each firefly
-        for firefly in fireflies:
-            firefly.update()
-            firefly.draw(draw)
+        frame_start = time.perf_counter()
 
-        # Display image on the OLED
-        display.image(image)
-        display.show()
+        # Clear the framebuffer
+        buf[1:] = blank
 
-        # Small delay to control animation speed
-        time.sleep(0.05) # Adjust this value to make it faster or slower
+        # Random movement
+        xs += rng.integers(-MOVE_SPEED, MOVE_SPEED + 1, NUM_FIREFLIES)
+        ys += rng.integers(-MOVE_SPEED, MOVE_SPEED + 1, NUM_FIREFLIES)
+
+        # Keep fireflies within screen bounds
+        np.clip(xs, 0, OLED_WIDTH - 1, out=xs)
+        np.clip(ys, 0, OLED_HEIGHT - 1, out=ys)
+
+        # Handle blinking: lit fireflies count down and go dark when their timer
+        # runs out, dark ones may blink on
+        blink = ~lit & (rng.random(NUM_FIREFLIES) < BLINK_CHANCE)
+        blink_timer[lit] -= 1
+        lit &= blink_timer > 0
+        lit |= blink
+        blink_timer[blink] = BLINK_DURATION
+
+        # Draw each lit firefly as a white pixel (or small square for larger size)
+        for x, y in zip(xs[lit].tolist(), ys[lit].tolist()):
+            for px in range(x, min(x + FIREFLY_SIZE, OLED_WIDTH)):
+                for py in range(y, min(y + FIREFLY_SIZE, OLED_HEIGHT)):
+                    buf[1 + (py >> 3) * OLED_WIDTH + px] |= 1 << (py & 7)
+
+        screen.show()
+
+        # Hold a steady frame rate
+        elapsed = time.perf_counter() - frame_start
+        if elapsed < FRAME_PERIOD:
+            time.sleep(FRAME_PERIOD - elapsed)
 
 except KeyboardInterrupt:
     print("\nExiting firefly simulation.")
-    # Clear the display before exiting
-    display.fill(0)
-    display.show()
+    screen.clear()
     print("Display cleared.")
 except Exception as e:
     print(f"An unexpected error occurred: {e}")
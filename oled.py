@@ -0,0 +1,184 @@
+import board
+import busio
+import adafruit_ssd1306
+from threading import Event, Thread
+import numpy as np
+
+# SSD1306 commands for setting the column and page window that display data is written into
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+
+# --- Display Setup ---
+# The SSD1306 runs happily in I2C fast mode (400 kHz), which cuts the time to
+# send a full frame from ~40 ms to ~10 ms. On Linux the bus speed is set by the
+# kernel, not by busio, so enable it by adding this line to /boot/config.txt
+# (/boot/firmware/config.txt on Bookworm) and rebooting:
+#     dtparam=i2c_arm_baudrate=400000
+# The frequency passed to busio documents the intent and applies on boards
+# where busio does control the clock.
+I2C_FREQUENCY = 400_000
+
+def open_display(width, height, addr=0x3C):
+    """
+    Opens an SSD1306 display on the default I2C pins and clears it. On a
+    Raspberry Pi those are SDA: GPIO 2 (physical pin 3) and SCL: GPIO 3
+    (physical pin 5).
+    The driver's framebuffer, display.buffer, starts with the I2C data
+    control byte, followed by the pixels in pages of 8 rows: pixel (x, y)
+    is bit (y & 7) of byte 1 + (y >> 3) * width + x.
+    :param width: Display width in pixels.
+    :param height: Display height in pixels.
+    :param addr: I2C address of the display.
+    :return: An adafruit_ssd1306.SSD1306_I2C display.
+    """
+    i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
+    display = adafruit_ssd1306.SSD1306_I2C(width, height, i2c, addr=addr)
+    display.fill(0)
+    display.show()
+    return display
+
+# --- Dirty-Rect Display Updates ---
+class DirtyRectDisplay:
+    """
+    Sends only the changed part of an SSD1306 framebuffer over I2C.
+    display.show() always transfers the whole framebuffer, which takes most
+    of a frame on a 100 kHz bus. This compares the framebuffer with the
+    last frame sent, narrows the display's write window to the bounding box
+    of the bytes that changed, and sends just that box, or nothing at all.
+    """
+    def __init__(self, display, frame=None):
+        """
+        :param display: An adafruit_ssd1306.SSD1306_I2C display. Whatever is
+                        in its framebuffer now is assumed to be on screen.
+        :param frame: Buffer to send frames from, laid out like display.buffer.
+                      Defaults to display.buffer itself.
+        """
+        if frame is None:
+            frame = display.buffer
+        elif display.page_addressing:
+            raise ValueError("Sending from a separate frame buffer needs horizontal addressing mode")
+        self.display = display
+        self.frame = frame
+        self.pages = display.height // 8
+        self.width = display.width
+        # Narrow displays use centered columns, as in the driver's show()
+        self.col_offset = (128 - self.width) // 2 if self.width != 128 else 0
+
+        # Last frame sent, and its pixels as (page, column) arrays.
+        # Byte 0 of the driver's buffer is the I2C control byte, not pixels.
+        self.sent = bytearray(frame)
+        self.sent_pixels = np.frombuffer(self.sent, dtype=np.uint8)[1:].reshape(self.pages, self.width)
+        self.pixels = np.frombuffer(frame, dtype=np.uint8)[1:].reshape(self.pages, self.width)
+        # I2C transfer buffers: Co=0, D/C#=0 for a command stream, D/C#=1 for data
+        self.window_cmd = bytearray((0x00, SET_COL_ADDR, 0, 0, SET_PAGE_ADDR, 0, 0))
+        self.data = bytearray(len(frame))
+        self.data[0] = 0x40
+
+    def show(self):
+        """
+        Sends whatever changed in the frame since the last call.
+        :return: True if anything was sent, False if the frame was unchanged.
+        """
+        display = self.display
+        if self.frame == self.sent:
+            return False
+        if display.page_addressing:
+            # The window commands only apply to horizontal addressing mode
+            display.show()
+            self.sent[:] = display.buffer
+            return True
+
+        changed = self.pixels != self.sent_pixels
+        pages = np.flatnonzero(changed.any(1))
+        cols = np.flatnonzero(changed.any(0))
+        page0, page1 = int(pages[0]), int(pages[-1])
+        col0, col1 = int(cols[0]), int(cols[-1])
+
+        # Pack the box page by page, in the order the controller fills its window
+        box = self.pixels[page0:page1 + 1, col0:col1 + 1]
+        end = 1 + box.size
+        self.data[1:end] = box.tobytes()
+
+        cmd = self.window_cmd
+        cmd[2] = col0 + self.col_offset
+        cmd[3] = col1 + self.col_offset
+        cmd[5] = page0
+        cmd[6] = page1
+        with display.i2c_device:
+            display.i2c_device.write(cmd)
+        with display.i2c_device:
+            display.i2c_device.write(self.data, end=end)
+
+        self.sent_pixels[page0:page1 + 1, col0:col1 + 1] = box
+        return True
+
+# --- Background Display Updates ---
+class ThreadedDisplay:
+    """
+    Sends frames on a background thread, so the I2C transfer of one frame
+    overlaps with computing and drawing the next. show() snapshots the
+    framebuffer into a second buffer and returns straight away; the worker
+    sends the snapshot with a DirtyRectDisplay. The GIL is released while
+    the bus write is in progress, so the two really do run side by side.
+    """
+    def __init__(self, display):
+        """
+        :param display: An adafruit_ssd1306.SSD1306_I2C display in horizontal
+                        addressing mode. Whatever is in its framebuffer now is
+                        assumed to be on screen.
+        """
+        self.display = display
+        # The frame the worker sends from; the caller keeps drawing into display.buffer
+        self.frame = bytearray(display.buffer)
+        self.sender = DirtyRectDisplay(display, self.frame)
+        self.ready = Event() # A new frame is waiting in self.frame
+        self.idle = Event()  # The worker is not using self.frame
+        self.idle.set()
+        self.error = None
+        Thread(target=self._run, name="oled-show", daemon=True).start()
+
+    def show(self):
+        """
+        Queues the current framebuffer to be sent. Only blocks if the previous
+        frame is still being sent. Raises any error the worker hit sending it.
+        """
+        self.wait()
+        self.idle.clear()
+        try:
+            self.frame[:] = self.display.buffer
+            self.ready.set()
+        except BaseException:
+            # Interrupted (e.g. Ctrl+C) before the worker got the frame, so
+            # nothing will set idle again; without this, wait() would hang
+            self.idle.set()
+            raise
+
+    def wait(self):
+        """
+        Blocks until the last queued frame has been sent, e.g. before using
+        the display directly. Raises any error the worker hit sending it.
+        """
+        self.idle.wait()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def clear(self):
+        """
+        Waits for the last queued frame to be sent, then blanks the screen,
+        e.g. on exit.
+        """
+        self.wait()
+        self.display.fill(0)
+        self.display.show()
+
+    def _run(self):
+        while True:
+            self.ready.wait()
+            self.ready.clear()
+            try:
+                self.sender.show()
+            except Exception as e:
+                self.error = e
+            finally:
+                self.idle.set()
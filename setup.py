@@ -0,0 +1,20 @@
+# Builds the optional Cython flock kernels (_boids_c.pyx), which birds.py
+# uses instead of the Numba/plain-Python ones in _boids_py.py when present.
+# On the Pi: pip install cython, then
+#     python setup.py build_ext --inplace
+import platform
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+compile_args = ["-O3", "-ffast-math"]
+if platform.machine().startswith("armv7"):
+    # 32-bit ARM needs NEON enabled explicitly for the compiler to vectorize with it
+    # (it is always on for 64-bit ARM)
+    compile_args += ["-mfpu=neon", "-mfloat-abi=hard"]
+
+setup(
+    name="pi-boids-kernels",
+    ext_modules=cythonize(
+        [Extension("_boids_c", ["_boids_c.pyx"], extra_compile_args=compile_args)],
+    ),
+)